@@ -0,0 +1,165 @@
+"""Microbenchmarks for the RemFile.read / _load_chunk hot path.
+
+The network is replaced by an in-memory transport so that these measure only
+the CPU overhead of remfile itself.
+See README.md in this directory for how to run them and compare against the
+stored baselines.
+"""
+import os
+import json
+import random
+import tracemalloc
+import pytest
+import remfile
+
+pytest.importorskip('pytest_benchmark')
+
+alloc_baseline_fname = os.path.join(os.path.dirname(__file__), 'microbenchmark_allocations.json')
+alloc_tolerance = 1.5  # fail if peak allocations exceed the baseline by this factor
+
+file_size = 64 * 1024 * 1024
+min_chunk_size = 100 * 1024
+
+
+class InMemoryTransport(remfile.Transport):
+    max_concurrency = 1
+
+    def __init__(self, data: bytes) -> None:
+        """A fake transport that serves byte ranges from memory.
+
+        Args:
+            data (bytes): The content of the file.
+        """
+        self.data = data
+        self.num_requests = 0
+
+    def get_bytes(self, url: str, start_byte: int, end_byte: int):
+        self.num_requests += 1
+        return self.data[start_byte: end_byte + 1]
+
+
+@pytest.fixture(scope='module')
+def data():
+    return random.Random(0).randbytes(file_size)
+
+
+@pytest.fixture
+def transport(data):
+    return InMemoryTransport(data)
+
+
+def _open(transport, **kwargs):
+    return remfile.File(
+        'memory://file',
+        transport=transport,
+        _size=file_size,
+        _min_chunk_size=min_chunk_size,
+        _stream_large_windows=False,
+        **kwargs
+    )
+
+
+def _cycle(items):
+    state = {'i': 0}
+
+    def next_item():
+        x = items[state['i'] % len(items)]
+        state['i'] += 1
+        return x
+    return next_item
+
+
+def _peak_alloc_bytes_per_op(op, num_ops: int = 200):
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(num_ops):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            op()
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - current
+    finally:
+        tracemalloc.stop()
+    return total / num_ops
+
+
+def _run(benchmark, name: str, op):
+    """Benchmark op, record its peak allocations, and compare them with the stored baseline."""
+    peak_alloc = _peak_alloc_bytes_per_op(op)
+    benchmark.extra_info['peak_alloc_bytes_per_op'] = peak_alloc
+    benchmark(op)
+
+    baselines = {}
+    if os.path.exists(alloc_baseline_fname):
+        with open(alloc_baseline_fname, 'r') as f:
+            baselines = json.load(f)
+    if os.environ.get('REMFILE_UPDATE_BENCHMARK_BASELINE') == '1':
+        baselines[name] = round(peak_alloc)
+        with open(alloc_baseline_fname, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+    elif name in baselines:
+        assert peak_alloc <= baselines[name] * alloc_tolerance + 1024, \
+            f'Peak allocations for {name} regressed: {peak_alloc} bytes/op vs baseline {baselines[name]}'
+
+
+def test_small_metadata_read(benchmark, transport):
+    # small reads at scattered offsets within chunks that are already loaded
+    f = _open(transport)
+    rng = random.Random(1)
+    offsets = [rng.randint(0, 20 * min_chunk_size) for _ in range(1000)]
+    for offset in offsets:
+        f.seek(offset)
+        f.read(8)
+    next_offset = _cycle(offsets)
+
+    def op():
+        f.seek(next_offset())
+        f.read(8)
+    _run(benchmark, 'small_metadata_read', op)
+
+
+def test_multi_chunk_read(benchmark, transport):
+    # a 1 MB read spanning 11 loaded chunks
+    f = _open(transport)
+    f.seek(0)
+    f.read(4 * 1024 * 1024)
+    next_offset = _cycle([12345, 500000, 2000000])
+
+    def op():
+        f.seek(next_offset())
+        f.read(1024 * 1024)
+    _run(benchmark, 'multi_chunk_read', op)
+
+
+def test_cache_eviction_churn(benchmark, transport):
+    # random reads across the whole file with a small in-memory cache, so that
+    # chunks are constantly loaded from the transport and evicted
+    f = _open(transport, _max_cache_size=2 * 1024 * 1024)
+    rng = random.Random(2)
+    next_offset = _cycle([rng.randint(0, file_size - 1000) for _ in range(1000)])
+
+    def op():
+        f.seek(next_offset())
+        f.read(1000)
+    _run(benchmark, 'cache_eviction_churn', op)
+
+
+def test_disk_cache_hit(benchmark, transport, tmp_path):
+    # chunks are served from the disk cache because the in-memory cache is cleared before each read
+    disk_cache = remfile.DiskCache(str(tmp_path))
+    f = _open(transport, disk_cache=disk_cache)
+    offsets = [i * min_chunk_size + 17 for i in range(20)]
+    for offset in offsets:
+        f.seek(offset)
+        f.read(1000)
+    num_requests = transport.num_requests
+    next_offset = _cycle(offsets)
+
+    def op():
+        f._chunks.clear()
+        f.seek(next_offset())
+        f.read(1000)
+    _run(benchmark, 'disk_cache_hit', op)
+    assert transport.num_requests == num_requests
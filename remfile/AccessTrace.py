@@ -0,0 +1,66 @@
+from typing import Union
+import sys
+import json
+import time
+from array import array
+
+
+class AccessTrace:
+    def __init__(self, length: Union[int, None] = None) -> None:
+        """A compact record of the reads made on a RemFile, for replaying offline with remfile.replay.
+
+        Pass an AccessTrace to remfile.File(url, _trace=trace) to record every read (offset, size and
+        timestamp in nanoseconds since the trace was created).
+
+        Args:
+            length (int, optional): The size of the file in bytes. Set automatically when the trace is passed to remfile.File.
+        """
+        self.length = length
+        self.offsets = array('q')
+        self.sizes = array('q')
+        self.timestamps_ns = array('q')
+        self._start_ns = time.perf_counter_ns()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def record(self, offset: int, size: int):
+        self.offsets.append(offset)
+        self.sizes.append(size)
+        self.timestamps_ns.append(time.perf_counter_ns() - self._start_ns)
+
+    def save(self, filename: str):
+        """Save the trace to a file: a one-line JSON header followed by the offsets, sizes and timestamps as little-endian int64 arrays.
+
+        Args:
+            filename (str): The file to write.
+        """
+        header = {'format': 'remfile-trace', 'version': 1, 'length': self.length, 'num_reads': len(self)}
+        with open(filename, 'wb') as f:
+            f.write((json.dumps(header) + '\n').encode('utf-8'))
+            for a in [self.offsets, self.sizes, self.timestamps_ns]:
+                if sys.byteorder == 'big':  # pragma: no cover
+                    a = array('q', a)
+                    a.byteswap()
+                a.tofile(f)
+
+    @staticmethod
+    def load(filename: str):
+        """Load a trace saved with save().
+
+        Args:
+            filename (str): The file to read.
+
+        Returns:
+            AccessTrace: The trace.
+        """
+        with open(filename, 'rb') as f:
+            header = json.loads(f.readline().decode('utf-8'))
+            if header.get('format') != 'remfile-trace':
+                raise Exception(f'Not a remfile trace: {filename}')
+            trace = AccessTrace(length=header['length'])
+            for a in [trace.offsets, trace.sizes, trace.timestamps_ns]:
+                a.fromfile(f, header['num_reads'])
+                if sys.byteorder == 'big':  # pragma: no cover
+                    a.byteswap()
+        return trace
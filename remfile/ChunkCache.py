@@ -0,0 +1,140 @@
+from typing import List, Tuple
+import threading
+from collections import OrderedDict
+
+
+class FrequencyCounter:
+    def __init__(self, capacity: int, *, max_count: int = 15) -> None:
+        """Counts how often each chunk was accessed recently, for the TinyLFU admission policy.
+
+        All counts are halved after 10 * capacity increments, so that they reflect recent history and the
+        number of chunks tracked stays proportional to the capacity. Unlike TinyLFU, the counts are exact
+        rather than a count-min sketch, because the number of chunks is small and a dict lookup is much
+        cheaper than hashing into several tables in Python.
+
+        Args:
+            capacity (int): The number of entries in the cache.
+            max_count (int, optional): The maximum count per chunk. Defaults to 15.
+        """
+        self._counts = {}
+        self._max_count = max_count
+        self._sample_size = 10 * max(1, capacity)
+        self._num_increments = 0
+
+    def increment(self, key: int):
+        count = self._counts.get(key, 0)
+        if count < self._max_count:
+            self._counts[key] = count + 1
+        self._num_increments += 1
+        if self._num_increments >= self._sample_size:
+            self._counts = {k: c >> 1 for k, c in self._counts.items() if c > 1}
+            self._num_increments //= 2
+
+    def frequency(self, key: int):
+        return self._counts.get(key, 0)
+
+
+class ChunkCache(dict):
+    def __init__(self, capacity: int, *, window_fraction: float = 0.2) -> None:
+        """The in-memory chunk store of a RemFile, with a scan-resistant W-TinyLFU replacement policy.
+
+        New chunks enter a small FIFO admission window. When the cache is over capacity, the oldest chunk of
+        the window is promoted to the main LRU segment if there is room, or if it has been accessed more often
+        (according to a FrequencyCounter) than the least recently used chunk of the main segment, which is
+        then evicted. Otherwise it is evicted. This way a long sequential scan cycles
+        through the window without pushing frequently used chunks (such as HDF5 metadata) out of the cache.
+        The window is ordered by insertion rather than by access, so that chunks loaded ahead of the reader
+        (for example by a stream) are not evicted before the chunks that have already been read.
+
+        Accesses are grouped into reads with end_read(). A chunk accessed again by the same read or by the
+        next one (as when a scan reads a chunk in several small pieces) is not counted again, so that only
+        chunks that are returned to later count as frequently used.
+
+        Eviction only happens in evict(), so that all the chunks needed by a read stay in memory until the
+        read is complete. Chunks are looked up like in a dict (keyed by chunk index), but must be added with put().
+
+        Args:
+            capacity (int): The maximum number of chunks to keep after evict().
+            window_fraction (float, optional): The fraction of the capacity used for the admission window. Defaults to 0.2.
+        """
+        super().__init__()
+        self._capacity = max(1, capacity)
+        self._main_capacity = max(1, int(self._capacity * (1 - window_fraction)))
+        self._window: OrderedDict = OrderedDict()
+        self._main: OrderedDict = OrderedDict()
+        self._frequencies = FrequencyCounter(self._capacity)
+        self._touched = set()  # chunks accessed by the current read
+        self._previously_touched = set()  # chunks accessed by the previous read
+        self._main_hits = set()  # chunks of the main segment that were accessed again after promotion
+        self._lock = threading.Lock()  # chunks may be added from stream threads
+
+    @property
+    def window_capacity(self):
+        """The number of chunks that fit in the admission window, i.e., the most that can be loaded ahead of the reader."""
+        return self._capacity - self._main_capacity
+
+    def touch(self, chunk_index: int):
+        """Record an access to a chunk, whether or not it is in the cache. Must be called from the reading thread."""
+        # no lock needed: the counts and the segment order are only changed structurally by the reading
+        # thread, and stream threads only add new chunks with put()
+        is_repeat = chunk_index in self._touched or chunk_index in self._previously_touched
+        self._touched.add(chunk_index)
+        if not is_repeat:
+            self._frequencies.increment(chunk_index)
+        if chunk_index in self._main:
+            self._main.move_to_end(chunk_index)
+            if not is_repeat:
+                self._main_hits.add(chunk_index)
+
+    def end_read(self):
+        """Mark the end of a read. Must be called from the reading thread."""
+        self._previously_touched, self._touched = self._touched, self._previously_touched
+        self._touched.clear()
+
+    def put(self, chunk_index: int, data: bytes):
+        with self._lock:
+            self[chunk_index] = data
+            if chunk_index in self._main:
+                self._main.move_to_end(chunk_index)
+            elif chunk_index not in self._window:
+                self._window[chunk_index] = None
+
+    def evict(self) -> List[Tuple[int, bytes, bool]]:
+        """Evict chunks until the cache is within its capacity.
+
+        Returns:
+            list[tuple[int, bytes, bool]]: The evicted chunks as (chunk_index, data, was_hit_in_main), where
+            was_hit_in_main tells whether the chunk was accessed again while in the main segment.
+        """
+        evicted = []
+        with self._lock:
+            while len(self) > self._capacity and self._window:
+                candidate, _ = self._window.popitem(last=False)
+                if len(self._main) < self._main_capacity:
+                    self._main[candidate] = None  # promote
+                    continue
+                victim = next(iter(self._main))
+                if self._frequencies.frequency(candidate) > self._frequencies.frequency(victim):
+                    # demote the victim out of memory and promote the candidate
+                    del self._main[victim]
+                    evicted.append((victim, self.pop(victim), self._pop_main_hit(victim)))
+                    self._main[candidate] = None
+                else:
+                    evicted.append((candidate, self.pop(candidate), False))
+            while len(self) > self._capacity and self._main:
+                victim, _ = self._main.popitem(last=False)  # pragma: no cover
+                evicted.append((victim, self.pop(victim), self._pop_main_hit(victim)))  # pragma: no cover
+        return evicted
+
+    def _pop_main_hit(self, chunk_index: int):
+        if chunk_index in self._main_hits:
+            self._main_hits.discard(chunk_index)
+            return True
+        return False
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._window.clear()
+            self._main.clear()
+            self._main_hits.clear()
@@ -0,0 +1,196 @@
+from typing import Callable
+import time
+import threading
+from .Transport import Transport
+
+
+class ChunkStream:
+    def __init__(
+        self,
+        transport: Transport,
+        url: str,
+        *,
+        start_chunk_index: int,
+        end_chunk_index: int,
+        chunk_size: int,
+        length: int,
+        on_chunk: Callable[[int, bytes], None],
+        num_threads: int = 1,
+        num_retries: int = 8,
+        verbose: bool = False,
+        _impose_request_failures_for_testing: bool = False,
+    ) -> None:
+        """Download a contiguous window of chunks in background threads, publishing each chunk as soon as its bytes arrive.
+
+        Args:
+            transport (Transport): The transport used to fetch the bytes.
+            url (str): The url of the remote file.
+            start_chunk_index (int): The index of the first chunk in the window.
+            end_chunk_index (int): The index of the last chunk in the window (inclusive).
+            chunk_size (int): The size of each chunk in bytes.
+            length (int): The size of the remote file in bytes.
+            on_chunk (Callable[[int, bytes], None]): Called from a worker thread with (chunk_index, data) for each chunk that arrives.
+            num_threads (int, optional): The number of parallel streams to split the window into. Defaults to 1.
+            num_retries (int, optional): The number of retries per stream. A retry resumes after the last published chunk. Defaults to 8.
+            verbose (bool, optional): Whether to print info for debugging. Defaults to False.
+            _impose_request_failures_for_testing (bool, optional): Whether to impose request failures for testing purposes. Defaults to False.
+        """
+        self._transport = transport
+        self._url = url
+        self.start_chunk_index = start_chunk_index
+        self.end_chunk_index = end_chunk_index
+        self._chunk_size = chunk_size
+        self._length = length
+        self._on_chunk = on_chunk
+        self._num_retries = num_retries
+        self._verbose = verbose
+        self._impose_request_failures_for_testing = _impose_request_failures_for_testing
+
+        # split the window into contiguous chunk ranges, one per worker
+        num_chunks = end_chunk_index - start_chunk_index + 1
+        num_threads = max(1, min(num_threads, num_chunks))
+        self._ranges: list[tuple[int, int]] = []
+        a = start_chunk_index
+        for i in range(num_threads):
+            if i == num_threads - 1:
+                b = end_chunk_index
+            else:
+                b = a + num_chunks // num_threads - 1
+            self._ranges.append((a, b))
+            a = b + 1
+
+        self._condition = threading.Condition()
+        self._next_chunk_index = [r[0] for r in self._ranges]
+        self._worker_done = [False for _ in self._ranges]
+        self._error = None
+        self._cancelled = threading.Event()
+        self._open_streams: set = set()
+        self._threads = [
+            threading.Thread(target=self._run_worker, args=(w,), daemon=True)
+            for w in range(len(self._ranges))
+        ]
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+
+    def covers(self, chunk_index: int):
+        return self.start_chunk_index <= chunk_index <= self.end_chunk_index
+
+    def is_finished(self):
+        with self._condition:
+            return all(self._worker_done)
+
+    def wait_for_chunk(self, chunk_index: int):
+        """Block until the given chunk has been published or the stream has stopped.
+
+        Args:
+            chunk_index (int): The index of the chunk to wait for. Must be covered by the stream.
+
+        Raises:
+            Exception: If the stream failed before the chunk was published.
+
+        Returns:
+            bool: True if the chunk was published, False if the stream was cancelled first.
+        """
+        w = self._worker_for_chunk(chunk_index)
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._next_chunk_index[w] > chunk_index or self._worker_done[w]
+            )
+            if self._next_chunk_index[w] > chunk_index:
+                return True
+            if self._error is not None:
+                raise self._error
+            return False
+
+    def cancel(self):
+        """Stop the remaining transfer. Chunks that were already published are kept."""
+        self._cancelled.set()
+        with self._condition:
+            streams = list(self._open_streams)
+        for stream in streams:
+            try:
+                stream.close()
+            except Exception:  # pragma: no cover
+                pass
+
+    def _worker_for_chunk(self, chunk_index: int):
+        for w, (a, b) in enumerate(self._ranges):
+            if a <= chunk_index <= b:
+                return w
+        raise ValueError(f"Chunk {chunk_index} is not covered by this stream")  # pragma: no cover
+
+    def _run_worker(self, w: int):
+        try:
+            for try_num in range(self._num_retries + 1):
+                if self._cancelled.is_set():
+                    return
+                try:
+                    actual_url = self._url
+                    if self._impose_request_failures_for_testing:
+                        if try_num == 0:
+                            actual_url = "_error_" + self._url
+                    self._stream_range(w, actual_url)
+                    return
+                except Exception as e:
+                    if self._cancelled.is_set():
+                        return
+                    if try_num == self._num_retries:
+                        with self._condition:
+                            self._error = e
+                        return
+                    delay = 0.1 * 2**try_num
+                    if self._verbose:
+                        print(f"Retrying stream after exception: {e}")
+                        print(f"Waiting {delay} seconds")
+                    time.sleep(delay)
+        finally:
+            with self._condition:
+                self._worker_done[w] = True
+                self._condition.notify_all()
+
+    def _stream_range(self, w: int, url: str):
+        last_chunk_index = self._ranges[w][1]
+        with self._condition:
+            next_chunk_index = self._next_chunk_index[w]
+        if next_chunk_index > last_chunk_index:
+            return  # pragma: no cover
+        range_start = next_chunk_index * self._chunk_size
+        range_end = min((last_chunk_index + 1) * self._chunk_size, self._length) - 1
+        stream = self._transport.open_stream(url, range_start, range_end)
+        with self._condition:
+            self._open_streams.add(stream)
+        try:
+            num_received = 0
+            buf = bytearray()
+            for piece in stream:
+                if self._cancelled.is_set():
+                    return
+                buf += piece
+                num_received += len(piece)
+                while len(buf) >= self._chunk_size and next_chunk_index <= last_chunk_index:
+                    self._publish(w, next_chunk_index, bytes(buf[: self._chunk_size]))
+                    del buf[: self._chunk_size]
+                    next_chunk_index += 1
+                if next_chunk_index > last_chunk_index or num_received >= range_end - range_start + 1:
+                    break
+            if self._cancelled.is_set():
+                return
+            if num_received < range_end - range_start + 1:
+                raise Exception(
+                    f"Stream ended after {num_received} of {range_end - range_start + 1} bytes"
+                )
+            if len(buf) > 0 and next_chunk_index <= last_chunk_index:
+                # the final partial chunk at the end of the file
+                self._publish(w, next_chunk_index, bytes(buf[: range_end - next_chunk_index * self._chunk_size + 1]))
+        finally:
+            with self._condition:
+                self._open_streams.discard(stream)
+            stream.close()
+
+    def _publish(self, w: int, chunk_index: int, data: bytes):
+        self._on_chunk(chunk_index, data)
+        with self._condition:
+            self._next_chunk_index[w] = chunk_index + 1
+            self._condition.notify_all()
@@ -1,27 +1,129 @@
 import os
 import hashlib
+import queue
+import threading
+import uuid
 
 
 class DiskCache:
-    def __init__(self, dirname: str) -> None:
+    def __init__(self, dirname: str, *, write_behind: bool = False, max_queue_size: int = 1000) -> None:
         """A simple non-lru disk cache.
 
+        Entries are written to a temporary file (named .tmp-*) that is then renamed, so readers never see a
+        partially written entry. If the process is killed during a write, the temporary file can be left
+        behind; get() never reads it, and it can be deleted along with the rest of the cache directory.
+
         Args:
             dirname (str): The directory to use for the cache.
+            write_behind (bool, optional): Whether to write entries on a background thread so that set() does not block. Entries that cannot be queued because the queue is full are dropped (counted in num_dropped), and entries that cannot be written are counted in num_failed. Queued entries are lost if the process exits before they are written; call flush() or close() to wait for them. Defaults to False.
+            max_queue_size (int, optional): The maximum number of entries waiting to be written in write-behind mode. Defaults to 1000.
         """
         self._dirname = dirname
+        self._write_behind = write_behind
+        self._max_queue_size = max_queue_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._pending: dict = {}  # entries queued but not yet written, so that get() can see them
+        self._lock = threading.Lock()
+        self._writer_thread = None
+        self._created_dirs: set = set()
+        self.num_dropped = 0
+        self.num_failed = 0  # entries that could not be written in write-behind mode
+
     def get(self, key: str):
-        h = hashlib.sha1(key.encode('utf-8')).hexdigest()
-        p = f'{h[0]}{h[1]}/{h[2]}{h[3]}/{h[4]}{h[5]}/{h}'
-        filename = os.path.join(self._dirname, p)
+        if self._write_behind:
+            with self._lock:
+                if key in self._pending:
+                    return self._pending[key]
+        filename = self._filename_for_key(key)
         if not os.path.exists(filename):
             return None
         with open(filename, 'rb') as f:
             return f.read()
+
     def set(self, key: str, value: bytes):
+        if not self._write_behind:
+            self._write(key, value)
+            return
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending[key] = value
+            try:
+                self._queue.put_nowait(key)
+            except queue.Full:
+                # drop the entry rather than slow down the reader
+                del self._pending[key]
+                self.num_dropped += 1
+                return
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(target=self._run_writer, args=(self._queue,), daemon=True)
+                self._writer_thread.start()
+
+    def flush(self):
+        """Wait until all queued entries have been written to disk."""
+        if self._write_behind:
+            self._queue.join()
+
+    def close(self):
+        """Write all queued entries and stop the background writer. A later set() starts a new writer."""
+        self.flush()
+        with self._lock:
+            writer_thread = self._writer_thread
+            writer_queue = self._queue
+            self._writer_thread = None
+            # a writer started by a later set() gets its own queue, so that it cannot take the stop signal
+            self._queue = queue.Queue(maxsize=self._max_queue_size)
+        if writer_thread is not None:
+            writer_queue.put(None)  # tells the writer to stop after the entries queued before it
+            writer_thread.join()
+
+    def _filename_for_key(self, key: str):
         h = hashlib.sha1(key.encode('utf-8')).hexdigest()
         p = f'{h[0]}{h[1]}/{h[2]}{h[3]}/{h[4]}{h[5]}/{h}'
-        filename = os.path.join(self._dirname, p)
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, 'wb') as f:
-            f.write(value)
\ No newline at end of file
+        return os.path.join(self._dirname, p)
+
+    def _write(self, key: str, value: bytes):
+        filename = self._filename_for_key(key)
+        dirname = os.path.dirname(filename)
+        try:
+            self._write_file(filename, dirname, value)
+        except FileNotFoundError:
+            # the directory was removed after we created it (e.g., the cache was cleared), so create it again
+            self._created_dirs.discard(dirname)
+            self._write_file(filename, dirname, value)
+
+    def _write_file(self, filename: str, dirname: str, value: bytes):
+        if dirname not in self._created_dirs:
+            os.makedirs(dirname, exist_ok=True)
+            self._created_dirs.add(dirname)
+        # write to a temporary file and rename so that other processes never see a partial file
+        # (open() rather than tempfile.mkstemp() so that the permissions follow the umask, like other files)
+        tmp_filename = os.path.join(
+            dirname, f'.tmp-{os.getpid()}-{threading.get_ident()}-{uuid.uuid4().hex}'
+        )
+        try:
+            with open(tmp_filename, 'xb') as f:
+                f.write(value)
+            os.replace(tmp_filename, filename)
+        except BaseException:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            raise
+
+    def _run_writer(self, writer_queue: queue.Queue):
+        while True:
+            key = writer_queue.get()
+            if key is None:
+                writer_queue.task_done()
+                return
+            try:
+                with self._lock:
+                    value = self._pending[key]
+                self._write(key, value)
+            except Exception:
+                with self._lock:
+                    self.num_failed += 1
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+                writer_queue.task_done()
@@ -0,0 +1,91 @@
+from typing import Any, Tuple
+from .Transport import Transport, RangeStream
+
+
+class HttpxTransport(Transport):
+    def __init__(
+        self,
+        client: Any = None,
+        *,
+        http2: bool = True,
+        max_connections: int = 10,
+        max_concurrency: int = 32,
+    ) -> None:
+        """Fetch bytes with the httpx library, which supports HTTP/2 (requires `pip install httpx[http2]`).
+
+        With HTTP/2, concurrent requests to the same host are multiplexed as streams over a single
+        connection instead of each needing their own connection. Note that the reads of a single file
+        (such as h5py metadata reads) are issued one at a time, so this only helps when requests are
+        actually concurrent: ranges split across threads (_max_threads > 1, for ranges of at least
+        2 * _bytes_per_thread), background streams, the size probes of open_many, or several files or
+        threads sharing the transport. The client is shared by all threads, and max_concurrency bounds
+        the number of requests in flight. If the server does not negotiate HTTP/2, httpx falls back to
+        HTTP/1.1 with a pool of up to max_connections connections.
+
+        Args:
+            client (httpx.Client, optional): The client to use, for sharing connections between files. If not provided, a new client is created.
+            http2 (bool, optional): Whether to enable HTTP/2 for a newly created client. Defaults to True.
+            max_connections (int, optional): The maximum number of connections for a newly created client. Defaults to 10.
+            max_concurrency (int, optional): The maximum number of requests that remfile issues concurrently. Defaults to 32.
+        """
+        try:
+            import httpx
+        except ImportError:  # pragma: no cover
+            raise ImportError("HttpxTransport requires httpx. Install it with: pip install 'httpx[http2]'")
+        if client is None:
+            client = httpx.Client(
+                http2=http2,
+                limits=httpx.Limits(max_connections=max_connections),
+                follow_redirects=True,
+                timeout=None,
+            )
+        self.client = client
+        self.max_concurrency = max_concurrency
+
+    def probe(self, url: str, prefetch_size: int = 0) -> Tuple[int, bytes]:
+        headers = {'Range': f'bytes=0-{prefetch_size - 1}'} if prefetch_size > 0 else {}
+        # use aborted GET request rather than HEAD request to get the length
+        # this is needed for presigned AWS URLs because HEAD requests are not supported
+        response = self.client.send(self.client.build_request('GET', url, headers=headers), stream=True)
+        try:
+            if response.status_code == 206:
+                # Content-Range: bytes 0-N/LENGTH
+                length = int(response.headers['Content-Range'].split('/')[-1])
+            elif response.status_code == 200:
+                length = int(response.headers['Content-Length'])
+            else:
+                raise Exception(
+                    f"Error getting file length: {response.status_code} {response.reason_phrase}"
+                )
+            prefix = b''
+            if prefetch_size > 0:
+                pieces = []
+                num_bytes = 0
+                for piece in response.iter_bytes(chunk_size=64 * 1024):
+                    pieces.append(piece)
+                    num_bytes += len(piece)
+                    if num_bytes >= prefetch_size:
+                        break
+                prefix = b''.join(pieces)[:prefetch_size]
+        finally:
+            response.close()
+        return length, prefix
+
+    def get_bytes(self, url: str, start_byte: int, end_byte: int) -> bytes:
+        response = self.client.get(url, headers={"Range": f"bytes={start_byte}-{end_byte}"})
+        return response.content
+
+    def open_stream(self, url: str, start_byte: int, end_byte: int) -> RangeStream:
+        range_header = f"bytes={start_byte}-{end_byte}"
+        response = self.client.send(
+            self.client.build_request('GET', url, headers={"Range": range_header}), stream=True
+        )
+        if response.status_code != 206 and not (response.status_code == 200 and start_byte == 0):
+            response.close()
+            raise Exception(
+                f"Error streaming bytes {range_header}: {response.status_code} {response.reason_phrase}"
+            )
+        return RangeStream(response.iter_bytes(chunk_size=64 * 1024), response.close)
+
+    def close(self):
+        self.client.close()
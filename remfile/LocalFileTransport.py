@@ -0,0 +1,50 @@
+from typing import Tuple
+import os
+from urllib.parse import urlparse, unquote
+from .Transport import Transport, RangeStream
+
+
+class LocalFileTransport(Transport):
+    def __init__(self, *, max_concurrency: int = 16) -> None:
+        """Read bytes from local files, addressed by file:// urls or plain paths. Useful for testing.
+
+        There is no pooling: every request opens the file, so requests never contend with each other.
+
+        Args:
+            max_concurrency (int, optional): The maximum number of reads that remfile issues concurrently. Defaults to 16.
+        """
+        self.max_concurrency = max_concurrency
+
+    def probe(self, url: str, prefetch_size: int = 0) -> Tuple[int, bytes]:
+        path = _path_for_url(url)
+        length = os.path.getsize(path)
+        prefix = b''
+        if prefetch_size > 0:
+            with open(path, 'rb') as f:
+                prefix = f.read(prefetch_size)
+        return length, prefix
+
+    def get_bytes(self, url: str, start_byte: int, end_byte: int) -> bytes:
+        with open(_path_for_url(url), 'rb') as f:
+            f.seek(start_byte)
+            return f.read(end_byte - start_byte + 1)
+
+    def open_stream(self, url: str, start_byte: int, end_byte: int) -> RangeStream:
+        f = open(_path_for_url(url), 'rb')
+        f.seek(start_byte)
+
+        def pieces():
+            num_remaining = end_byte - start_byte + 1
+            while num_remaining > 0 and not f.closed:
+                piece = f.read(min(64 * 1024, num_remaining))
+                if not piece:
+                    break
+                num_remaining -= len(piece)
+                yield piece
+        return RangeStream(pieces(), f.close)
+
+
+def _path_for_url(url: str):
+    if url.startswith('file://'):
+        return unquote(urlparse(url).path)
+    return url
@@ -1,8 +1,13 @@
-from typing import Union, Any
+from typing import Union, Any, Callable
 import time
 from concurrent.futures import ThreadPoolExecutor
-import requests
 from .DiskCache import DiskCache
+from .ChunkCache import ChunkCache
+from .ChunkStream import ChunkStream
+from .Transport import Transport
+from .RequestsTransport import RequestsTransport
+from .LocalFileTransport import LocalFileTransport
+from .AccessTrace import AccessTrace
 
 default_min_chunk_size = 100 * 1024
 default_max_cache_size = 1e9
@@ -18,6 +23,7 @@ class RemFile:
         *,
         verbose: bool = False,
         disk_cache: Union[DiskCache, None] = None,
+        transport: Union[Transport, None] = None,
         _min_chunk_size: int = default_min_chunk_size,
         _max_cache_size: int = default_max_cache_size,
         _chunk_increment_factor: int = default_chunk_increment_factor,
@@ -26,7 +32,10 @@ class RemFile:
         _max_chunk_size: int = 100 * 1024 * 1024,
         _impose_request_failures_for_testing: bool = False,
         _size: Union[int, None] = None,
-        _use_session: bool = True
+        _use_session: bool = True,
+        _stream_large_windows: bool = True,
+        _trace: Union[AccessTrace, None] = None,
+        _persistent_max_window_size: Union[int, None] = None
     ):
         """Create a file-like object for reading a remote file. Optimized for reading hdf5 files. The arguments starting with an underscore are for testing and debugging purposes - they may experience breaking changes in the future.
 
@@ -34,15 +43,19 @@ class RemFile:
             url (str): The url of the remote file, or an object with a .get_url() method. The latter is useful if the url is a presigned AWS URL that expires after a certain amount of time.
             verbose (bool, optional): Whether to print info for debugging. Defaults to False.
             disk_cache (DiskCache, optional): A disk cache for storing the chunks of the file. Defaults to None.
+            transport (Transport, optional): The transport used to fetch bytes, which can be shared between files. Defaults to a LocalFileTransport for file:// urls and a RequestsTransport otherwise.
             _min_chunk_size (int, optional): The minimum chunk size. When reading, the chunks will be loaded in multiples of this size.
-            _max_cache_size (int, optional): The maximum number of bytes to keep in the cache.
+            _max_cache_size (int, optional): The maximum number of bytes to keep in the in-memory cache. Frequently used chunks are protected from being pushed out by large sequential reads (see ChunkCache).
             _chunk_increment_factor (int, optional): The factor by which to increase the number of chunks to load when the system detects that the chunks are being loaded in order.
             _bytes_per_thread (int, optional): The minimum number of bytes to load in each thread.
             _max_threads (int, optional): The maximum number of threads to use when loading the file.
-            _max_chunk_size (int, optional): The maximum chunk size. When reading, the chunks will be loaded in multiples of the minimum chunk size up to this size.
+            _max_chunk_size (int, optional): The maximum chunk size. When reading, the chunks will be loaded in multiples of the minimum chunk size up to this size (or up to a fifth of _max_cache_size, if that is smaller).
             _impose_request_failures_for_testing (bool, optional): Whether to impose request failures for testing purposes. Defaults to False.
             _size: The size of the file in bytes. If not provided, the size will be determined by making a GET request to the file.
-            _use_session: Whether to use a requests.Session object for making requests. Defaults to True.
+            _use_session: Whether to use a requests.Session object for making requests when the default RequestsTransport is used. Defaults to True.
+            _stream_large_windows: Whether to stream windows that have grown to the maximum chunk size. Chunks are published as they arrive, reads return as soon as their own bytes are present, and the remaining transfer is cancelled when reads move elsewhere. Defaults to True.
+            _trace: An AccessTrace in which to record every read, for tuning the parameters above offline with remfile.replay. Defaults to None.
+            _persistent_max_window_size: If provided, chunks loaded in windows larger than this many bytes are not written to the disk cache when they are loaded, but only if they are later evicted from the main segment of the in-memory cache after being read again there (i.e., they turned out to be frequently used). This keeps bulk scans out of the disk cache. Defaults to None (all chunks are written).
         """
         self._url = url
         self._verbose = verbose
@@ -54,41 +67,33 @@ class RemFile:
         self._max_threads = _max_threads
         self._max_chunk_size = _max_chunk_size
         self._impose_request_failures_for_testing = _impose_request_failures_for_testing
-        self._chunks = {}
-        self._chunk_indices: list[
-            int
-        ] = (
-            []
-        )  # list of chunk indices in order of loading for purposes of cleaning up the cache
+        self._stream_large_windows = _stream_large_windows
+        self._trace = _trace
+        self._persistent_max_window_size = _persistent_max_window_size
+        self._chunks = ChunkCache(self._max_chunks_in_cache)
+        self._unpersisted_chunk_indices = set()  # chunks in memory that were kept out of the disk cache
         self._position = 0
         self._smart_loader_last_chunk_index_accessed = -99
         self._smart_loader_chunk_sequence_length = 1
-
-        if _size is None or _use_session is True:
-            _assert_we_are_not_using_pyodide()
+        self._active_stream: Union[ChunkStream, None] = None
+
+        # called by close() to release a transport created for this file
+        self._release_transport: Union[Callable[[], None], None] = None
+        if transport is None:
+            if not _is_local_url(_get_url_str(self._url)) and (_size is None or _use_session is True):
+                _assert_we_are_not_using_pyodide()
+            transport = _default_transport_for(_get_url_str(self._url), use_session=_use_session)
+            self._release_transport = transport.close
+        self.transport = transport
+        # kept for backwards compatibility
+        self.session = transport.session if isinstance(transport, RequestsTransport) else None
 
         if _size is None:
-            # use aborted GET request rather than HEAD request to get the length
-            # this is needed for presigned AWS URLs because HEAD requests are not supported
-            response = requests.get(_get_url_str(self._url), stream=True)
-            if response.status_code == 200:
-                self.length = int(response.headers["Content-Length"])
-            else:
-                raise Exception(
-                    f"Error getting file length: {response.status_code} {response.reason}"
-                )
-            # Close the connection without reading the content to avoid downloading the whole file
-            response.close()
-
-            # response = requests.head(_get_url_str(self._url))
-            # self.length = int(response.headers['Content-Length'])
+            self.length, _ = self.transport.probe(_get_url_str(self._url))
         else:
             self.length = _size
-
-        if _use_session:
-            self.session = requests.Session()
-        else:
-            self.session = None
+        if self._trace is not None and self._trace.length is None:
+            self._trace.length = self.length
 
     async def create_lite(url: str):
         # for use with pyodide/jupyterlite
@@ -110,6 +115,8 @@ class RemFile:
             raise Exception(
                 "The size argument must be provided in remfile"
             )  # pragma: no cover
+        if self._trace is not None:
+            self._trace.record(self._position, size)
 
         chunk_start_index = self._position // self._min_chunk_size
         chunk_end_index = (self._position + size - 1) // self._min_chunk_size
@@ -119,8 +126,7 @@ class RemFile:
             chunk = self._chunks[chunk_start_index]
             chunk_offset = self._position % self._min_chunk_size
             chunk_length = size
-            self._position += size
-            return chunk[chunk_offset: chunk_offset + chunk_length]
+            ret = chunk[chunk_offset: chunk_offset + chunk_length]
         else:
             pieces_to_concat = []
             for chunk_index in range(chunk_start_index, chunk_end_index + 1):
@@ -137,24 +143,20 @@ class RemFile:
                 pieces_to_concat.append(
                     chunk[chunk_offset: chunk_offset + chunk_length]
                 )
-        ret = b"".join(pieces_to_concat)
+            ret = b"".join(pieces_to_concat)
         self._position += size
+        self._chunks.end_read()
 
         # clean up the cache
-        if len(self._chunk_indices) > self._max_chunks_in_cache:
+        if len(self._chunks) > self._max_chunks_in_cache:
             if self._verbose:
                 print("Cleaning up cache")
-            for chunk_index in self._chunk_indices[
-                : int(self._max_chunks_in_cache * 0.5)
-            ]:
-                if chunk_index in self._chunks:
-                    del self._chunks[chunk_index]
-                else:
-                    # it is possible that the chunk was already deleted (repeated chunk index in the list)
-                    pass
-            self._chunk_indices = self._chunk_indices[
-                int(self._max_chunks_in_cache * 0.5):
-            ]
+            for chunk_index, data, was_hit_in_main in self._chunks.evict():
+                if chunk_index in self._unpersisted_chunk_indices:
+                    self._unpersisted_chunk_indices.discard(chunk_index)
+                    if was_hit_in_main:
+                        # demote a frequently used chunk to the disk cache
+                        self._write_to_disk_cache(chunk_index, data)
 
         return ret
 
@@ -164,32 +166,50 @@ class RemFile:
         Args:
             chunk_index (int): The index of the chunk to load.
         """
+        self._chunks.touch(chunk_index)
         if chunk_index in self._chunks:
             self._smart_loader_last_chunk_index_accessed = chunk_index
             return
 
+        if self._active_stream is not None:
+            if self._active_stream.covers(chunk_index):
+                # wait for the stream to deliver this chunk rather than requesting it again
+                if self._wait_for_stream_chunk(chunk_index):
+                    self._smart_loader_last_chunk_index_accessed = chunk_index
+                    return
+            else:
+                # the access pattern has moved elsewhere
+                self._cancel_active_stream()
+
         if self._disk_cache:
             kk = _key_for_disk_cache(
                 _get_url_str(self._url), self._min_chunk_size, chunk_index
             )
             cached_value = self._disk_cache.get(kk)
             if cached_value:
-                self._chunks[chunk_index] = cached_value
-                self._chunk_indices.append(chunk_index)
+                # promote from the disk cache
+                self._chunks.put(chunk_index, cached_value)
                 self._smart_loader_last_chunk_index_accessed = chunk_index
                 return
 
+        # a larger window would push its own chunks out of the cache before they are read
+        max_chunk_sequence_length = max(1, min(
+            int(self._max_chunk_size / self._min_chunk_size), self._chunks.window_capacity
+        ))
         if chunk_index == self._smart_loader_last_chunk_index_accessed + 1:
             # round up to the chunk sequence length times 1.7
             self._smart_loader_chunk_sequence_length = round(
                 self._smart_loader_chunk_sequence_length * 1.7 + 0.5
             )
             if (
-                self._smart_loader_chunk_sequence_length > self._max_chunk_size / self._min_chunk_size
+                self._smart_loader_chunk_sequence_length > max_chunk_sequence_length
             ):
-                self._smart_loader_chunk_sequence_length = int(
-                    self._max_chunk_size / self._min_chunk_size
-                )
+                self._smart_loader_chunk_sequence_length = max_chunk_sequence_length
+            # decide on persistence before trimming, since a window that is cut short by chunks
+            # that are already loaded is still part of a large sequential read
+            persist = self._should_persist_window(
+                self._smart_loader_chunk_sequence_length * self._min_chunk_size
+            )
             # make sure the chunk sequence length is valid
             for j in range(1, self._smart_loader_chunk_sequence_length):
                 if chunk_index + j in self._chunks:
@@ -200,18 +220,35 @@ class RemFile:
             self._smart_loader_chunk_sequence_length = round(
                 self._smart_loader_chunk_sequence_length / 1.7 + 0.5
             )
+            persist = self._should_persist_window(
+                self._smart_loader_chunk_sequence_length * self._min_chunk_size
+            )
         data_start = chunk_index * self._min_chunk_size
         data_end = (
             data_start + self._min_chunk_size * self._smart_loader_chunk_sequence_length - 1
         )
+        if data_end >= self.length:
+            data_end = self.length - 1
+        if (
+            self._stream_large_windows
+            and self._smart_loader_chunk_sequence_length > 1
+            and self._smart_loader_chunk_sequence_length == max_chunk_sequence_length
+        ):
+            if (
+                self._start_stream(chunk_index, data_end // self._min_chunk_size, persist=persist)
+                and self._wait_for_stream_chunk(chunk_index)
+            ):
+                self._smart_loader_last_chunk_index_accessed = (
+                    chunk_index + self._smart_loader_chunk_sequence_length - 1
+                )
+                return
+            # otherwise load the window without streaming
         if self._verbose:
             print(
                 f"Loading {self._smart_loader_chunk_sequence_length} chunks starting at {chunk_index} ({(data_end - data_start + 1)/1e6} million bytes)"
             )
-        if data_end >= self.length:
-            data_end = self.length - 1
         x = _get_bytes(
-            self.session,
+            self.transport,
             _get_url_str(self._url),
             data_start,
             data_end,
@@ -220,37 +257,137 @@ class RemFile:
             max_threads=self._max_threads,
             _impose_request_failures_for_testing=self._impose_request_failures_for_testing,
         )
-        if self._smart_loader_chunk_sequence_length == 1:
-            self._chunks[chunk_index] = x
-            if self._disk_cache:
-                self._disk_cache.set(
-                    _key_for_disk_cache(
-                        _get_url_str(self._url), self._min_chunk_size, chunk_index
-                    ),
-                    self._chunks[chunk_index],
-                )
-            self._chunk_indices.append(chunk_index)
-        else:
-            for i in range(self._smart_loader_chunk_sequence_length):
-                if i * self._min_chunk_size >= len(x):
-                    break
-                self._chunks[chunk_index + i] = x[
-                    i * self._min_chunk_size: (i + 1) * self._min_chunk_size
-                ]
-                if self._disk_cache:
-                    self._disk_cache.set(
-                        _key_for_disk_cache(
-                            _get_url_str(self._url),
-                            self._min_chunk_size,
-                            chunk_index + i,
-                        ),
-                        self._chunks[chunk_index + i],
-                    )
-                self._chunk_indices.append(chunk_index + i)
+        for i in range(self._smart_loader_chunk_sequence_length):
+            if i * self._min_chunk_size >= len(x):
+                break
+            self._store_chunk(
+                chunk_index + i,
+                x[i * self._min_chunk_size: (i + 1) * self._min_chunk_size],
+                persist=persist
+            )
         self._smart_loader_last_chunk_index_accessed = (
             chunk_index + self._smart_loader_chunk_sequence_length - 1
         )
 
+    def _store_chunk(self, chunk_index: int, data: bytes, persist: bool = True):
+        """Add a downloaded chunk to the in-memory cache and the disk cache (if any).
+
+        Args:
+            chunk_index (int): The index of the chunk.
+            data (bytes): The content of the chunk.
+            persist (bool, optional): Whether to write the chunk to the disk cache now. Otherwise it is only written if it is demoted from the main segment of the in-memory cache after being read again there. Defaults to True.
+        """
+        self._chunks.put(chunk_index, data)
+        if self._disk_cache:
+            if persist:
+                self._write_to_disk_cache(chunk_index, data)
+            else:
+                self._unpersisted_chunk_indices.add(chunk_index)
+
+    def _write_to_disk_cache(self, chunk_index: int, data: bytes):
+        self._disk_cache.set(
+            _key_for_disk_cache(
+                _get_url_str(self._url), self._min_chunk_size, chunk_index
+            ),
+            data,
+        )
+
+    def _should_persist_window(self, num_bytes: int):
+        return self._persistent_max_window_size is None or num_bytes <= self._persistent_max_window_size
+
+    def _add_prefetched_bytes(self, data: bytes):
+        """Add bytes loaded from the start of the file to the cache. Only whole chunks (or the final chunk of the file) are kept.
+
+        Args:
+            data (bytes): The first bytes of the file.
+        """
+        if len(data) >= self.length:
+            num_chunks = (self.length + self._min_chunk_size - 1) // self._min_chunk_size
+        else:
+            num_chunks = len(data) // self._min_chunk_size
+        for i in range(num_chunks):
+            if i not in self._chunks:
+                self._store_chunk(
+                    i, data[i * self._min_chunk_size: (i + 1) * self._min_chunk_size]
+                )
+
+    def _start_stream(self, start_chunk_index: int, end_chunk_index: int, persist: bool = True):
+        """Start streaming a window of chunks in the background, cancelling any stream already in progress.
+
+        Args:
+            start_chunk_index (int): The index of the first chunk in the window.
+            end_chunk_index (int): The index of the last chunk in the window (inclusive).
+            persist (bool, optional): Whether to write the chunks to the disk cache as they arrive (see _store_chunk). Defaults to True.
+
+        Returns:
+            bool: Whether the stream was started. It is not if threads cannot be started (e.g., in pyodide).
+        """
+        self._cancel_active_stream()
+        num_bytes = (end_chunk_index - start_chunk_index + 1) * self._min_chunk_size
+        if self._verbose:
+            print(
+                f"Streaming {end_chunk_index - start_chunk_index + 1} chunks starting at {start_chunk_index} ({num_bytes/1e6} million bytes)"
+            )
+        self._active_stream = ChunkStream(
+            self.transport,
+            _get_url_str(self._url),
+            start_chunk_index=start_chunk_index,
+            end_chunk_index=end_chunk_index,
+            chunk_size=self._min_chunk_size,
+            length=self.length,
+            on_chunk=lambda i, data: self._store_chunk(i, data, persist=persist),
+            num_threads=min(
+                _num_threads_for(num_bytes, self._bytes_per_thread, self._max_threads),
+                self.transport.max_concurrency,
+            ),
+            num_retries=_num_request_retries,
+            verbose=self._verbose,
+            _impose_request_failures_for_testing=self._impose_request_failures_for_testing,
+        )
+        try:
+            self._active_stream.start()
+        except RuntimeError as e:
+            if self._verbose:
+                print(f"Could not start stream: {e}")
+            self._cancel_active_stream()
+            return False
+        return True
+
+    def _wait_for_stream_chunk(self, chunk_index: int):
+        """Wait for the active stream to deliver a chunk.
+
+        If the stream failed or stopped before delivering the chunk, or the chunk was already evicted, the
+        stream is discarded so that the chunk (and later ones) are loaded with a new request.
+
+        Args:
+            chunk_index (int): The index of the chunk, which must be covered by the active stream.
+
+        Returns:
+            bool: Whether the chunk is now in the in-memory cache.
+        """
+        try:
+            published = self._active_stream.wait_for_chunk(chunk_index)
+        except Exception as e:
+            if self._verbose:
+                print(f"Stream failed: {e}")
+            published = False
+        if published and chunk_index in self._chunks:
+            return True
+        if not published:
+            self._cancel_active_stream()
+        return False
+
+    def _cancel_active_stream(self):
+        if self._active_stream is None:
+            return
+        if not self._active_stream.is_finished():
+            if self._verbose:
+                print(
+                    f"Cancelling stream of chunks {self._active_stream.start_chunk_index}-{self._active_stream.end_chunk_index}"
+                )
+            self._active_stream.cancel()
+        self._active_stream = None
+
     def seek(self, offset: int, whence: int = 0):
         """Seek to a position in the file.
 
@@ -276,7 +413,22 @@ class RemFile:
         return self._position
 
     def close(self):
-        pass
+        self._cancel_active_stream()
+        if self._release_transport is not None:
+            release_transport = self._release_transport
+            self._release_transport = None
+            release_transport()
+
+
+def _is_local_url(url: str):
+    return url.startswith("file://")
+
+
+def _default_transport_for(url: str, *, use_session: bool = True, pool_maxsize: int = 10) -> Transport:
+    """Create the transport used when none is given: a LocalFileTransport for file:// urls and a RequestsTransport otherwise."""
+    if _is_local_url(url):
+        return LocalFileTransport()
+    return RequestsTransport(use_session=use_session, pool_maxsize=pool_maxsize)
 
 
 def _key_for_disk_cache(url: str, min_chunk_size: int, chunk_index: int):
@@ -287,7 +439,7 @@ _num_request_retries = 8
 
 
 def _get_bytes(
-    session: Union[requests.Session, None],
+    transport: Transport,
     url: str,
     start_byte: int,
     end_byte: int,
@@ -300,6 +452,7 @@ def _get_bytes(
     """Get bytes from a remote file.
 
     Args:
+        transport (Transport): The transport used to fetch the bytes.
         url (str): The url of the remote file.
         start_byte (int): The first byte to get.
         end_byte (int): The last byte to get.
@@ -330,14 +483,7 @@ def _get_bytes(
                 if _impose_request_failures_for_testing:
                     if try_num == 0:
                         actual_url = "_error_" + url
-                range_header = f"bytes={range_start}-{range_end}"
-
-                if session:
-                    # use session to avoid creating a new connection each time
-                    response = session.get(actual_url, headers={"Range": range_header})
-                else:
-                    response = requests.get(actual_url, headers={'Range': range_header})
-                return response.content
+                return transport.get_bytes(actual_url, range_start, range_end)
             except Exception as e:
                 if try_num == num_retries:
                     raise e  # pragma: no cover
@@ -348,15 +494,10 @@ def _get_bytes(
                         print(f"Waiting {delay} seconds")
                     time.sleep(delay)
 
-    num_threads = num_bytes // bytes_per_thread
-    if num_threads > max_threads:
-        num_threads = max_threads
-    if num_threads == 0:
-        num_threads = 1
-    if num_bytes < bytes_per_thread * 2:
-        # If the number of bytes is less than 2 times the bytes_per_thread,
-        # then we can just use a single thread
-        num_threads = 1
+    num_threads = min(
+        _num_threads_for(num_bytes, bytes_per_thread, max_threads),
+        transport.max_concurrency,
+    )
 
     if num_threads == 1:
         return fetch_bytes(start_byte, end_byte, _num_request_retries, verbose)
@@ -384,6 +525,19 @@ def _get_bytes(
         return final_content
 
 
+def _num_threads_for(num_bytes: int, bytes_per_thread: int, max_threads: int):
+    num_threads = num_bytes // bytes_per_thread
+    if num_threads > max_threads:
+        num_threads = max_threads
+    if num_threads == 0:
+        num_threads = 1
+    if num_bytes < bytes_per_thread * 2:
+        # If the number of bytes is less than 2 times the bytes_per_thread,
+        # then we can just use a single thread
+        num_threads = 1
+    return num_threads
+
+
 def _get_url_str(url: Union[str, Any]):
     if isinstance(url, str):
         return url
@@ -427,7 +581,8 @@ async def _create_lite(url: str):
     return RemFile(
         url=url,
         _size=size,
-        _use_session=False
+        _use_session=False,
+        _stream_large_windows=False  # threads cannot be started in pyodide
     )
 
 
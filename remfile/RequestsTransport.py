@@ -0,0 +1,95 @@
+from typing import Union, Tuple
+import requests
+from .Transport import Transport, RangeStream
+
+
+class RequestsTransport(Transport):
+    def __init__(
+        self,
+        session: Union[requests.Session, None] = None,
+        *,
+        use_session: bool = True,
+        pool_maxsize: int = 10,
+    ) -> None:
+        """Fetch bytes over HTTP/1.1 with the requests library.
+
+        Each connection carries one request at a time. With a session, connections are kept alive and pooled
+        (up to pool_maxsize per host), so max_concurrency equals the pool size. For a session passed in by the
+        caller, pool_maxsize is not applied to the session but is still used as max_concurrency, so it should
+        not exceed the pool size of the session's adapters. Without a session, every request opens a new
+        connection.
+
+        Args:
+            session (requests.Session, optional): The session to use, for sharing a connection pool between files. If not provided and use_session is True, a new session is created.
+            use_session (bool, optional): Whether to use a requests.Session for making requests. Defaults to True.
+            pool_maxsize (int, optional): The maximum number of pooled connections per host for a newly created session, and the maximum number of concurrent requests (max_concurrency). Defaults to 10.
+        """
+        self.max_concurrency = pool_maxsize
+        if session is None and use_session:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+    def probe(self, url: str, prefetch_size: int = 0) -> Tuple[int, bytes]:
+        if prefetch_size > 0:
+            response = self._get(url, headers={'Range': f'bytes=0-{prefetch_size - 1}'}, stream=True)
+        else:
+            # use aborted GET request rather than HEAD request to get the length
+            # this is needed for presigned AWS URLs because HEAD requests are not supported
+            response = self._get(url, stream=True)
+        try:
+            if response.status_code == 206:
+                # Content-Range: bytes 0-N/LENGTH
+                length = int(response.headers['Content-Range'].split('/')[-1])
+            elif response.status_code == 200:
+                # the server ignored the range header, so only read what we need
+                length = int(response.headers['Content-Length'])
+            else:
+                raise Exception(
+                    f"Error getting file length: {response.status_code} {response.reason}"
+                )
+            prefix = b''
+            if prefetch_size > 0 and response.status_code == 206:
+                # the body is bounded by the range, so read all of it and the connection goes back to the pool
+                prefix = response.content[:prefetch_size]
+            elif prefetch_size > 0:
+                pieces = []
+                num_bytes = 0
+                for piece in response.iter_content(chunk_size=64 * 1024):
+                    pieces.append(piece)
+                    num_bytes += len(piece)
+                    if num_bytes >= prefetch_size:
+                        break
+                prefix = b''.join(pieces)[:prefetch_size]
+        finally:
+            # Close the connection without reading the rest of the content (if any)
+            response.close()
+        return length, prefix
+
+    def get_bytes(self, url: str, start_byte: int, end_byte: int) -> bytes:
+        range_header = f"bytes={start_byte}-{end_byte}"
+        # use session (if any) to avoid creating a new connection each time
+        response = self._get(url, headers={"Range": range_header})
+        return response.content
+
+    def open_stream(self, url: str, start_byte: int, end_byte: int) -> RangeStream:
+        range_header = f"bytes={start_byte}-{end_byte}"
+        response = self._get(url, headers={"Range": range_header}, stream=True)
+        if response.status_code != 206 and not (response.status_code == 200 and start_byte == 0):
+            response.close()
+            raise Exception(
+                f"Error streaming bytes {range_header}: {response.status_code} {response.reason}"
+            )
+        return RangeStream(response.iter_content(chunk_size=64 * 1024), response.close)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+    def _get(self, url: str, **kwargs):
+        if self.session is not None:
+            return self.session.get(url, **kwargs)
+        else:
+            return requests.get(url, **kwargs)
@@ -0,0 +1,73 @@
+from typing import Callable, Iterable, Tuple
+
+
+class RangeStream:
+    def __init__(self, pieces: Iterable[bytes], close: Callable[[], None]) -> None:
+        """An open streaming response for a byte range.
+
+        Args:
+            pieces (Iterable[bytes]): The content of the range, in pieces of arbitrary size, as it arrives.
+            close (Callable[[], None]): Closes the underlying response. May be called from another thread to cancel the transfer.
+        """
+        self._pieces = pieces
+        self._close = close
+
+    def __iter__(self):
+        return iter(self._pieces)
+
+    def close(self):
+        self._close()
+
+
+class Transport:
+    """Base class for the transports that remfile uses to fetch bytes of a remote file.
+
+    Subclasses define their own concurrency and pooling semantics. remfile
+    never issues more than max_concurrency requests at once on a transport
+    for a single file, and transports must be safe to use from multiple
+    threads.
+    """
+
+    # The maximum number of requests that remfile should issue concurrently on this transport
+    max_concurrency: int = 1
+
+    def probe(self, url: str, prefetch_size: int = 0) -> Tuple[int, bytes]:
+        """Determine the size of a remote file, optionally loading the first bytes in the same request.
+
+        Args:
+            url (str): The url of the remote file.
+            prefetch_size (int, optional): The number of bytes to load from the start of the file. Defaults to 0.
+
+        Returns:
+            tuple[int, bytes]: The size of the file and the bytes loaded from the start of the file.
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+    def get_bytes(self, url: str, start_byte: int, end_byte: int) -> bytes:
+        """Fetch a range of bytes.
+
+        Args:
+            url (str): The url of the remote file.
+            start_byte (int): The first byte to get.
+            end_byte (int): The last byte to get (inclusive).
+
+        Returns:
+            bytes: The bytes fetched.
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+    def open_stream(self, url: str, start_byte: int, end_byte: int) -> RangeStream:
+        """Start fetching a range of bytes as a stream.
+
+        Args:
+            url (str): The url of the remote file.
+            start_byte (int): The first byte to get.
+            end_byte (int): The last byte to get (inclusive). The stream may yield more bytes than requested if the server ignores the range, but always starts at start_byte.
+
+        Returns:
+            RangeStream: The open stream.
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+    def close(self):
+        pass
@@ -2,4 +2,10 @@ import importlib.metadata
 __version__ = importlib.metadata.version("remfile")
 
 from .RemFile import RemFile as File
-from .DiskCache import DiskCache
\ No newline at end of file
+from .DiskCache import DiskCache
+from .open_many import open_many
+from .Transport import Transport
+from .RequestsTransport import RequestsTransport
+from .HttpxTransport import HttpxTransport
+from .LocalFileTransport import LocalFileTransport
+from .AccessTrace import AccessTrace
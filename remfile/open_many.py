@@ -0,0 +1,93 @@
+from typing import Union, Any, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .RemFile import (
+    RemFile, _get_url_str, _assert_we_are_not_using_pyodide, _is_local_url, _default_transport_for,
+    default_min_chunk_size
+)
+from .Transport import Transport
+
+
+def open_many(
+    urls: List[Union[str, Any]],
+    *,
+    prefetch_size: int = 0,
+    max_workers: int = 16,
+    transport: Union[Transport, None] = None,
+    **kwargs
+) -> List[RemFile]:
+    """Open many remote files at once. The sizes of the files are probed concurrently over a shared transport, so opening N files costs about one round trip rather than N.
+
+    Args:
+        urls (list): The urls of the remote files. Each can be a string or an object with a .get_url() method.
+        prefetch_size (int, optional): The number of bytes at the start of each file to load in the same request as the size probe, for example to cover the HDF5 superblock and root group. It is rounded up to a whole number of chunks. Defaults to 0 (no prefetch).
+        max_workers (int, optional): The maximum number of concurrent probes. Defaults to 16.
+        transport (Transport, optional): The transport to share between the files. If not provided, the files share a RequestsTransport with a connection pool of size max_workers, except that file:// urls share a LocalFileTransport (as with remfile.File), and these are closed once all the files using them have been closed.
+        **kwargs: Additional keyword arguments passed to remfile.File for each file.
+
+    Returns:
+        list[RemFile]: The opened files, in the same order as the urls.
+    """
+    url_strs = [_get_url_str(url) for url in urls]
+    if transport is None:
+        # one shared transport per kind of url, so that a list may mix local and remote files
+        owners = {}
+        for url_str in url_strs:
+            is_local = _is_local_url(url_str)
+            if is_local not in owners:
+                if not is_local:
+                    _assert_we_are_not_using_pyodide()
+                owners[is_local] = _SharedTransportOwner(
+                    _default_transport_for(url_str, pool_maxsize=max_workers), 0
+                )
+            owners[is_local].num_files += 1
+        url_owners = [owners[_is_local_url(url_str)] for url_str in url_strs]
+    else:
+        url_owners = [None for _ in url_strs]
+
+    # only whole chunks of the prefix are kept, so don't fetch a partial chunk
+    chunk_size = kwargs.get('_min_chunk_size', default_min_chunk_size)
+    prefetch_size = -(-prefetch_size // chunk_size) * chunk_size
+
+    def transport_for(i: int):
+        return url_owners[i].transport if url_owners[i] is not None else transport
+
+    def probe(i: int):
+        return transport_for(i).probe(url_strs[i], prefetch_size)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as executor:
+            probe_results = list(executor.map(probe, range(len(urls))))
+    except BaseException:
+        for owner in set(o for o in url_owners if o is not None):
+            owner.transport.close()
+        raise
+
+    ret = []
+    for i, (url, (length, prefix)) in enumerate(zip(urls, probe_results)):
+        f = RemFile(url, transport=transport_for(i), _size=length, **kwargs)
+        f._add_prefetched_bytes(prefix)
+        if url_owners[i] is not None:
+            f._release_transport = url_owners[i].release
+        ret.append(f)
+    return ret
+
+
+class _SharedTransportOwner:
+    def __init__(self, transport: Transport, num_files: int) -> None:
+        """Closes a transport shared by several files once all of them have released it.
+
+        Args:
+            transport (Transport): The shared transport.
+            num_files (int): The number of files sharing the transport.
+        """
+        self.transport = transport
+        self.num_files = num_files
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            self.num_files -= 1
+            done = self.num_files == 0
+        if done:
+            self.transport.close()
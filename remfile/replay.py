@@ -0,0 +1,219 @@
+"""Replay recorded access traces offline to tune remfile parameters.
+
+Example:
+
+    trace = remfile.AccessTrace()
+    f = remfile.File(url, _trace=trace)
+    ...  # run the workload, e.g. with h5py
+    trace.save('trace.bin')
+
+    python -m remfile.replay trace.bin --latency 0.05 --bandwidth 20e6
+    python -m remfile.replay trace.bin --grid _bytes_per_thread=1e6,4e6 --grid _max_cache_size=1e8,1e9
+"""
+from typing import Any, Dict, List, Tuple, Union
+import argparse
+import inspect
+import itertools
+import threading
+from .AccessTrace import AccessTrace
+from .RemFile import RemFile
+from .Transport import Transport, RangeStream
+
+default_grid = {
+    '_min_chunk_size': [32 * 1024, 100 * 1024, 256 * 1024, 1024 * 1024],
+    '_max_chunk_size': [10 * 1024 * 1024, 100 * 1024 * 1024],
+    '_max_threads': [1, 4],
+}
+
+
+class SimulatedTransport(Transport):
+    # let _max_threads alone determine the number of threads
+    max_concurrency = 1024
+
+    def __init__(self) -> None:
+        """A transport that returns zeros without any I/O and records each request for the latency/bandwidth model."""
+        self.requests: List[Tuple[Any, int]] = []  # (concurrency group, number of bytes)
+        self._lock = threading.Lock()
+        self._read_index = 0
+        self._num_sequential_requests = 0
+
+    def start_read(self, read_index: int):
+        self._read_index = read_index
+
+    def get_bytes(self, url: str, start_byte: int, end_byte: int) -> bytes:
+        num_bytes = end_byte - start_byte + 1
+        self._record(num_bytes)
+        return bytes(num_bytes)
+
+    def open_stream(self, url: str, start_byte: int, end_byte: int) -> RangeStream:
+        num_bytes = end_byte - start_byte + 1
+        self._record(num_bytes)
+        return RangeStream([bytes(num_bytes)], lambda: None)
+
+    def _record(self, num_bytes: int):
+        name = threading.current_thread().name
+        with self._lock:
+            if name.startswith('ThreadPoolExecutor'):
+                # the requests of one multi-threaded fetch run in parallel
+                group = (self._read_index, name.rsplit('_', 1)[0])
+            else:
+                group = (self._read_index, self._num_sequential_requests)
+                self._num_sequential_requests += 1
+            self.requests.append((group, num_bytes))
+
+
+def replay_trace(
+    trace: AccessTrace,
+    *,
+    latency: float = 0.05,
+    bandwidth: float = 20e6,
+    **params
+) -> Dict[str, Any]:
+    """Replay a trace through the real RemFile chunk loading and cache logic, without any network access.
+
+    The estimated wall time uses a simple model: each request costs latency + num_bytes / bandwidth, and
+    the requests of one multi-threaded fetch run in parallel over separate connections. Large windows are
+    not streamed during replay (unless _stream_large_windows=True is passed), and the time between reads
+    in the trace is not included.
+
+    Args:
+        trace (AccessTrace): The recorded trace.
+        latency (float, optional): The simulated round trip time per request in seconds. Defaults to 0.05.
+        bandwidth (float, optional): The simulated bandwidth per connection in bytes per second. Defaults to 20e6.
+        **params: Parameters passed to remfile.File, e.g. _min_chunk_size, _max_chunk_size, _bytes_per_thread, _max_threads and _max_cache_size.
+
+    Returns:
+        dict: The parameters and the resulting num_reads, num_requests, bytes_read (unique bytes read), bytes_fetched, bytes_over_fetched, cache_hit_rate (fraction of chunk accesses served from memory) and estimated_wall_time (seconds).
+    """
+    if trace.length is None:
+        raise Exception('The trace does not have a file length')
+    transport = SimulatedTransport()
+    f = RemFile(
+        'simulated://file',
+        transport=transport,
+        _size=trace.length,
+        **{'_stream_large_windows': False, **params}
+    )
+    min_chunk_size = f._min_chunk_size
+    num_chunk_accesses = 0
+    num_chunk_hits = 0
+    ranges = []
+    for i, (offset, size) in enumerate(zip(trace.offsets, trace.sizes)):
+        size = min(size, trace.length - offset)
+        if size <= 0:
+            continue
+        transport.start_read(i)
+        for chunk_index in range(offset // min_chunk_size, (offset + size - 1) // min_chunk_size + 1):
+            num_chunk_accesses += 1
+            if chunk_index in f._chunks:
+                num_chunk_hits += 1
+        f.seek(offset)
+        f.read(size)
+        ranges.append((offset, offset + size))
+    f.close()
+
+    group_times: Dict[Any, float] = {}
+    for group, num_bytes in transport.requests:
+        group_times[group] = max(group_times.get(group, 0), latency + num_bytes / bandwidth)
+    bytes_fetched = sum(num_bytes for _, num_bytes in transport.requests)
+    bytes_read = _size_of_union(ranges)
+    return {
+        **params,
+        'num_reads': len(ranges),
+        'num_requests': len(transport.requests),
+        'bytes_read': bytes_read,
+        'bytes_fetched': bytes_fetched,
+        'bytes_over_fetched': max(0, bytes_fetched - bytes_read),
+        'cache_hit_rate': num_chunk_hits / num_chunk_accesses if num_chunk_accesses > 0 else 0,
+        'estimated_wall_time': sum(group_times.values()),
+    }
+
+
+def replay_grid(
+    trace: AccessTrace,
+    grid: Dict[str, list] = default_grid,
+    **kwargs
+) -> List[Dict[str, Any]]:
+    """Replay a trace for every combination of parameter values in a grid.
+
+    Args:
+        trace (AccessTrace): The recorded trace.
+        grid (dict, optional): Maps remfile.File parameter names to lists of values to try.
+        **kwargs: Passed to replay_trace (latency, bandwidth and fixed parameters).
+
+    Returns:
+        list[dict]: The results of replay_trace for each combination, sorted by estimated wall time.
+    """
+    names = list(grid.keys())
+    results = []
+    for values in itertools.product(*[grid[name] for name in names]):
+        results.append(replay_trace(trace, **kwargs, **dict(zip(names, values))))
+    results.sort(key=lambda r: r['estimated_wall_time'])
+    return results
+
+
+def _size_of_union(ranges: List[Tuple[int, int]]):
+    total = 0
+    current_start, current_end = None, None
+    for start, end in sorted(ranges):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def _parse_grid_option(option: str) -> Tuple[str, list]:
+    """Parse a --grid option of the form name=v1,v2,... into a parameter name and a list of numbers."""
+    name, sep, values = option.partition('=')
+    name = name.strip()
+    if not name.startswith('_'):
+        name = '_' + name
+    if not sep or not values:
+        raise ValueError(f'Expected name=v1,v2,... but got {option!r}')
+    if name not in inspect.signature(RemFile.__init__).parameters:
+        raise ValueError(f'Unknown remfile.File parameter: {name}')
+    return name, [_parse_number(v) for v in values.split(',')]
+
+
+def _parse_number(value: str) -> Union[int, float]:
+    x = float(value)
+    return int(x) if x.is_integer() else x
+
+
+def main(argv: Union[List[str], None] = None):
+    parser = argparse.ArgumentParser(description='Replay a remfile access trace for a grid of parameter settings')
+    parser.add_argument('trace_file', help='A trace saved with AccessTrace.save()')
+    parser.add_argument('--latency', type=float, default=0.05, help='Round trip time per request in seconds')
+    parser.add_argument('--bandwidth', type=float, default=20e6, help='Bandwidth per connection in bytes per second')
+    parser.add_argument(
+        '--grid', action='append', default=[], metavar='NAME=V1,V2,...',
+        help='Values to try for a remfile.File parameter, e.g. _bytes_per_thread=1e6,4e6 or _max_cache_size=1e8,1e9. '
+        'Replaces the default values for that parameter; can be repeated.'
+    )
+    args = parser.parse_args(argv)
+
+    grid = dict(default_grid)
+    for option in args.grid:
+        try:
+            name, values = _parse_grid_option(option)
+        except ValueError as e:
+            parser.error(str(e))
+        grid[name] = values
+
+    trace = AccessTrace.load(args.trace_file)
+    results = replay_grid(trace, grid, latency=args.latency, bandwidth=args.bandwidth)
+    columns = list(grid.keys()) + [
+        'num_requests', 'bytes_fetched', 'bytes_over_fetched', 'cache_hit_rate', 'estimated_wall_time'
+    ]
+    print('  '.join(f'{c.lstrip("_"):>20}' for c in columns))
+    for r in results:
+        print('  '.join(f'{r[c]:>20.3f}' if isinstance(r[c], float) else f'{r[c]:>20}' for c in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,9 @@ setup(
         'h5py',
         'requests'
     ],
+    extras_require={
+        'http2': ['httpx[http2]']
+    },
     tests_require=[
         "pytest",
         "pytest-cov"
@@ -0,0 +1,108 @@
+import re
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+
+
+class RangeServer:
+    def __init__(self, data: bytes, *, keep_alive: bool = False) -> None:
+        """A local http server for a single in-memory file that supports Range requests. Used for tests that should not depend on the network.
+
+        Args:
+            data (bytes): The content of the file.
+            keep_alive (bool, optional): Whether to speak HTTP/1.1 and keep connections open between requests, rather than HTTP/1.0. Defaults to False.
+        """
+        self.data = data
+        self.bytes_per_second = None  # set to throttle responses
+        self.num_requests = 0
+        self.num_bytes_sent = 0
+        self.num_connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            if keep_alive:
+                protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                server.num_connections += 1
+                super().setup()
+
+            def do_GET(self):
+                server.num_requests += 1
+                m = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+                if m:
+                    start = int(m.group(1))
+                    end = min(int(m.group(2)), len(server.data) - 1)
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(server.data)}")
+                else:
+                    start, end = 0, len(server.data) - 1
+                    self.send_response(200)
+                self.send_header("Content-Length", str(end - start + 1))
+                self.end_headers()
+                try:
+                    for a in range(start, end + 1, 16 * 1024):
+                        piece = server.data[a: min(a + 16 * 1024, end + 1)]
+                        self.wfile.write(piece)
+                        server.num_bytes_sent += len(piece)
+                        if server.bytes_per_second:
+                            time.sleep(len(piece) / server.bytes_per_second)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/file.bin"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def reset_counters(self):
+        self.num_requests = 0
+        self.num_bytes_sent = 0
+        self.num_connections = 0
+
+    def shutdown(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def range_server():
+    data = random.Random(0).randbytes(4 * 1024 * 1024 + 123)
+    server = RangeServer(data)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def keep_alive_range_server():
+    data = random.Random(0).randbytes(4 * 1024 * 1024 + 123)
+    server = RangeServer(data, keep_alive=True)
+    yield server
+    server.shutdown()
+
+
+class LocalFile:
+    def __init__(self, path, data: bytes) -> None:
+        """A file of random bytes on the local filesystem, read through a file:// url by the LocalFileTransport.
+
+        Args:
+            path (pathlib.Path): The path of the file.
+            data (bytes): The content of the file.
+        """
+        path.write_bytes(data)
+        self.path = path
+        self.data = data
+        self.url = f"file://{path}"
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    def create(num_bytes: int = 2 * 1024 * 1024):
+        return LocalFile(tmp_path / "file.bin", random.Random(0).randbytes(num_bytes))
+    return create
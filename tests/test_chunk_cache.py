@@ -0,0 +1,149 @@
+import remfile
+from remfile.ChunkCache import ChunkCache
+
+
+def test_chunk_cache_is_scan_resistant():
+    cache = ChunkCache(100)
+    hot = list(range(10))
+    for _ in range(5):
+        for i in hot:
+            cache.touch(i)
+            if i not in cache:
+                cache.put(i, b'hot')
+            cache.end_read()
+    # a long scan, evicting after every chunk as RemFile does after each read
+    for i in range(1000, 5000):
+        if i % 200 == 0:
+            # the hot chunks keep being used during the scan
+            for j in hot:
+                cache.touch(j)
+                cache.end_read()
+        cache.touch(i)
+        cache.put(i, b'scan')
+        cache.end_read()
+        cache.evict()
+        assert len(cache) <= 100
+    for i in hot:
+        assert i in cache
+
+
+def test_metadata_survives_streaming_workload(local_file, tmp_path):
+    source = local_file(8 * 1024 * 1024)
+    data = source.data
+    disk_cache = remfile.DiskCache(str(tmp_path / 'cache'))
+    f = remfile.File(
+        source.url,
+        disk_cache=disk_cache,
+        _min_chunk_size=16 * 1024,
+        _max_chunk_size=256 * 1024,
+        _max_cache_size=1024 * 1024,
+        _persistent_max_window_size=64 * 1024,
+    )
+    metadata_offsets = [100, 20000, 40000]
+
+    def read_metadata():
+        for offset in metadata_offsets:
+            f.seek(offset)
+            assert f.read(100) == data[offset: offset + 100]
+
+    read_metadata()
+    read_metadata()
+    # bulk scan of the rest of the file, much larger than the in-memory cache
+    pos = 1024 * 1024
+    while pos < len(data):
+        f.seek(pos)
+        n = min(50000, len(data) - pos)
+        assert f.read(n) == data[pos: pos + n]
+        pos += n
+        if pos % (1024 * 1024) < 50000:
+            read_metadata()
+    for offset in metadata_offsets:
+        assert offset // (16 * 1024) in f._chunks
+    f.close()
+
+    # the large windows of the scan were kept out of the disk cache
+    scan_chunk_indices = range(1024 * 1024 // (16 * 1024), len(data) // (16 * 1024))
+    num_scan_chunks_on_disk = 0
+    for chunk_index in scan_chunk_indices:
+        key = f'{source.url}|{16 * 1024}|{chunk_index}'
+        if disk_cache.get(key) is not None:
+            num_scan_chunks_on_disk += 1
+    assert num_scan_chunks_on_disk < len(scan_chunk_indices) * 0.1
+
+
+def test_repeated_touches_are_counted_once():
+    cache = ChunkCache(10)
+    # a chunk read in several pieces by consecutive reads
+    for _ in range(5):
+        cache.touch(1)
+        cache.touch(1)
+        cache.end_read()
+    assert cache._frequencies.frequency(1) == 1
+    # a chunk that is returned to later
+    for _ in range(3):
+        cache.touch(2)
+        cache.end_read()
+        cache.touch(3)
+        cache.end_read()
+    assert cache._frequencies.frequency(2) == 3
+
+
+def test_only_chunks_hit_in_main_are_flagged():
+    cache = ChunkCache(5)
+    for i in range(6):
+        cache.touch(i)
+        cache.put(i, b'x')
+        cache.end_read()
+    # chunks 0-3 are promoted to the main segment because there is room, and 4 is evicted
+    assert cache.evict() == [(4, b'x', False)]
+    cache.touch(0)
+    cache.end_read()
+    # frequently used chunks push chunks 0-3 out of the main segment
+    evicted = []
+    for i in range(10, 15):
+        for _ in range(3):
+            cache.touch(i)
+            cache.end_read()
+            cache.touch(99)
+            cache.end_read()
+        cache.put(i, b'x')
+        evicted.extend(cache.evict())
+    # chunk 5 is still in the window and is evicted as well
+    assert sorted(evicted) == [
+        (0, b'x', True), (1, b'x', False), (2, b'x', False), (3, b'x', False), (5, b'x', False)
+    ]
+
+
+def test_scan_is_kept_out_of_disk_cache(local_file, tmp_path):
+    source = local_file(16 * 1024 * 1024)
+    data = source.data
+    disk_cache = remfile.DiskCache(str(tmp_path / 'cache'))
+    f = remfile.File(
+        source.url,
+        disk_cache=disk_cache,
+        _min_chunk_size=16 * 1024,
+        _max_chunk_size=256 * 1024,
+        _max_cache_size=1024 * 1024,
+        _persistent_max_window_size=64 * 1024,
+    )
+    written = []
+    write_to_disk_cache = f._write_to_disk_cache
+
+    def record_write(chunk_index, chunk_data):
+        written.append(chunk_index)
+        write_to_disk_cache(chunk_index, chunk_data)
+    f._write_to_disk_cache = record_write
+
+    # a pure sequential scan, with reads smaller and larger than a chunk
+    pos = 0
+    for n in [1000, 50000] * (len(data) // 51000 + 1):
+        if pos >= len(data):
+            break
+        f.seek(pos)
+        n = min(n, len(data) - pos)
+        assert f.read(n) == data[pos: pos + n]
+        pos += n
+    f.close()
+    # only the small windows at the start of the scan, before it is recognized as sequential
+    assert len(written) <= 10
+    assert all(chunk_index < 10 for chunk_index in written)
@@ -0,0 +1,107 @@
+import os
+import shutil
+import threading
+import remfile
+
+
+def test_write_behind(tmp_path):
+    disk_cache = remfile.DiskCache(str(tmp_path), write_behind=True)
+    for i in range(100):
+        disk_cache.set(f'key{i}', f'value{i}'.encode())
+    # queued entries are visible before they reach the disk
+    assert disk_cache.get('key5') == b'value5'
+    disk_cache.flush()
+
+    disk_cache2 = remfile.DiskCache(str(tmp_path))
+    for i in range(100):
+        assert disk_cache2.get(f'key{i}') == f'value{i}'.encode()
+    assert disk_cache2.get('key100') is None
+
+    # no temporary files are left behind
+    for _, _, filenames in os.walk(tmp_path):
+        assert not any(fn.startswith('.tmp-') for fn in filenames)
+
+
+def test_write_behind_drops_under_backpressure(tmp_path):
+    disk_cache = remfile.DiskCache(str(tmp_path), write_behind=True, max_queue_size=2)
+    blocked = threading.Event()
+    original_write = disk_cache._write
+
+    def slow_write(key, value):
+        blocked.wait()
+        original_write(key, value)
+    disk_cache._write = slow_write
+
+    for i in range(10):
+        disk_cache.set(f'key{i}', b'x')
+    # the writer holds at most one entry and the queue holds two
+    assert disk_cache.num_dropped >= 7
+    blocked.set()
+    disk_cache.flush()
+    assert disk_cache.get('key0') == b'x'
+    assert disk_cache.get('key9') is None
+
+
+def test_cache_directory_removed_while_running(tmp_path):
+    dirname = str(tmp_path / 'cache')
+    disk_cache = remfile.DiskCache(dirname)
+    disk_cache.set('key1', b'a')
+    shutil.rmtree(dirname)
+    disk_cache.set('key1', b'b')
+    assert disk_cache.get('key1') == b'b'
+
+
+def test_close_stops_writer(tmp_path):
+    disk_cache = remfile.DiskCache(str(tmp_path), write_behind=True)
+    for i in range(20):
+        disk_cache.set(f'key{i}', b'x')
+    writer_thread = disk_cache._writer_thread
+    disk_cache.close()
+    assert not writer_thread.is_alive()
+    assert remfile.DiskCache(str(tmp_path)).get('key19') == b'x'
+    # the cache can still be used after close()
+    disk_cache.set('key20', b'y')
+    disk_cache.close()
+    assert remfile.DiskCache(str(tmp_path)).get('key20') == b'y'
+
+
+def test_cache_files_follow_umask(tmp_path):
+    old_umask = os.umask(0o022)
+    try:
+        disk_cache = remfile.DiskCache(str(tmp_path))
+        disk_cache.set('key1', b'a')
+    finally:
+        os.umask(old_umask)
+    mode = os.stat(disk_cache._filename_for_key('key1')).st_mode & 0o777
+    assert mode == 0o644
+
+
+def test_write_behind_counts_failures(tmp_path):
+    disk_cache = remfile.DiskCache(str(tmp_path), write_behind=True)
+
+    def failing_write(key, value):
+        raise OSError('disk full')
+    disk_cache._write = failing_write
+    disk_cache.set('key1', b'a')
+    disk_cache.flush()
+    assert disk_cache.num_failed == 1
+    assert disk_cache.get('key1') is None
+
+
+def test_close_while_other_thread_sets(tmp_path):
+    disk_cache = remfile.DiskCache(str(tmp_path), write_behind=True, max_queue_size=10)
+
+    def set_entries():
+        for i in range(3000):
+            disk_cache.set(f'key{i}', b'x')
+    setter = threading.Thread(target=set_entries)
+    setter.start()
+    # a set() between the writer being detached and told to stop must not start a writer that takes the stop signal
+    while setter.is_alive():
+        writer_thread = disk_cache._writer_thread
+        disk_cache.close()
+        if writer_thread is not None:
+            assert not writer_thread.is_alive()
+    setter.join()
+    disk_cache.close()
+    assert disk_cache._writer_thread is None
@@ -0,0 +1,85 @@
+import remfile
+
+
+def test_open_many(range_server):
+    data = range_server.data
+    urls = [range_server.url for _ in range(20)]
+    files = remfile.open_many(urls, prefetch_size=64 * 1024, _min_chunk_size=16 * 1024)
+    assert len(files) == 20
+    # one request per file for both the size and the first block
+    assert range_server.num_requests == 20
+    for f in files:
+        assert f.length == len(data)
+        assert f.transport is files[0].transport
+        f.seek(100)
+        assert f.read(1000) == data[100:1100]
+    # the first block was prefetched
+    assert range_server.num_requests == 20
+
+    files[0].seek(len(data) - 10)
+    assert files[0].read(10) == data[-10:]
+
+
+def test_open_many_without_prefetch(range_server):
+    files = remfile.open_many([range_server.url, range_server.url])
+    assert [f.length for f in files] == [len(range_server.data)] * 2
+    assert len(files[0]._chunks) == 0
+
+
+def test_open_many_prefetch_smaller_than_chunk(range_server):
+    data = range_server.data
+    files = remfile.open_many([range_server.url] * 3, prefetch_size=1000, _min_chunk_size=16 * 1024)
+    assert range_server.num_requests == 3
+    # the prefetch is rounded up to a whole chunk, so the first read makes no extra request
+    for f in files:
+        f.seek(10)
+        assert f.read(2000) == data[10:2010]
+    assert range_server.num_requests == 3
+
+
+def test_open_many_closes_created_transport(range_server):
+    files = remfile.open_many([range_server.url] * 3)
+    transport = files[0].transport
+    num_closes = []
+    original_close = transport.close
+
+    def close():
+        num_closes.append(1)
+        original_close()
+    transport.close = close
+
+    files[0].close()
+    files[0].close()
+    files[1].close()
+    assert num_closes == []
+    # the transport is closed when the last file is closed
+    files[2].close()
+    assert num_closes == [1]
+
+
+def test_open_many_reuses_probe_connections(keep_alive_range_server):
+    server = keep_alive_range_server
+    data = server.data
+    files = remfile.open_many([server.url] * 4, prefetch_size=1000, max_workers=4, _min_chunk_size=16 * 1024)
+    num_connections = server.num_connections
+    assert num_connections <= 4
+    # the reads use the connections of the probes rather than opening new ones
+    for f in files:
+        f.seek(100 * 1024)
+        assert f.read(1000) == data[100 * 1024: 100 * 1024 + 1000]
+    assert server.num_connections == num_connections
+    for f in files:
+        f.close()
+
+
+def test_open_many_local_and_remote(range_server, local_file):
+    source = local_file(1000)
+    local_data = source.data
+    files = remfile.open_many([source.url, range_server.url, source.url], prefetch_size=10)
+    assert isinstance(files[0].transport, remfile.LocalFileTransport)
+    assert isinstance(files[1].transport, remfile.RequestsTransport)
+    assert files[2].transport is files[0].transport
+    assert files[0].read(5) == local_data[:5]
+    assert files[1].read(5) == range_server.data[:5]
+    for f in files:
+        f.close()
@@ -0,0 +1,58 @@
+import pytest
+import remfile
+from remfile.replay import replay_trace, replay_grid, main
+
+
+def test_record_and_replay(range_server, tmp_path):
+    data = range_server.data
+    trace = remfile.AccessTrace()
+    f = remfile.File(range_server.url, _trace=trace, _min_chunk_size=16 * 1024)
+    reads = [(0, 100), (1000, 8), (500000, 20000), (520000, 20000), (3000000, 1)]
+    for offset, size in reads:
+        f.seek(offset)
+        assert f.read(size) == data[offset: offset + size]
+    f.close()
+    assert len(trace) == len(reads)
+    assert trace.length == len(data)
+
+    fname = str(tmp_path / 'trace.bin')
+    trace.save(fname)
+    trace2 = remfile.AccessTrace.load(fname)
+    assert list(trace2.offsets) == [r[0] for r in reads]
+    assert list(trace2.sizes) == [r[1] for r in reads]
+    assert list(trace2.timestamps_ns) == list(trace.timestamps_ns)
+
+    range_server.reset_counters()
+    result = replay_trace(trace2, latency=0.1, bandwidth=1e6, _min_chunk_size=16 * 1024)
+    assert range_server.num_requests == 0
+    assert result['num_reads'] == len(reads)
+    assert result['bytes_read'] == 100 + 8 + 40000 + 1
+    assert result['bytes_fetched'] >= result['bytes_read']
+    assert result['bytes_over_fetched'] == result['bytes_fetched'] - result['bytes_read']
+    assert 0 < result['cache_hit_rate'] < 1
+    assert result['estimated_wall_time'] >= result['num_requests'] * 0.1
+
+    results = replay_grid(trace2, {'_min_chunk_size': [1024, 64 * 1024], '_max_threads': [1, 2]})
+    assert len(results) == 4
+    assert results[0]['estimated_wall_time'] <= results[-1]['estimated_wall_time']
+
+
+def test_replay_command_line_grid(tmp_path, capsys):
+    trace = remfile.AccessTrace(length=10 * 1024 * 1024)
+    for offset in range(0, 8 * 1024 * 1024, 100000):
+        trace.record(offset, 100000)
+    fname = str(tmp_path / 'trace.bin')
+    trace.save(fname)
+
+    main([
+        fname,
+        '--grid', '_min_chunk_size=16384', '--grid', 'max_chunk_size=1e6', '--grid', '_max_threads=2',
+        '--grid', '_bytes_per_thread=1e5,1e6', '--grid', '_max_cache_size=1e6,1e7',
+    ])
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert 'bytes_per_thread' in lines[0]
+    assert 'max_cache_size' in lines[0]
+    assert len(lines) == 1 + 4
+
+    with pytest.raises(SystemExit):
+        main([fname, '--grid', '_no_such_parameter=1'])
@@ -0,0 +1,167 @@
+import random
+import time
+import importlib
+import pytest
+import remfile
+
+
+def test_streaming_reads_match_content(range_server):
+    data = range_server.data
+    f = remfile.File(
+        range_server.url,
+        _min_chunk_size=16 * 1024,
+        _max_chunk_size=256 * 1024,
+        _bytes_per_thread=64 * 1024,
+        _max_threads=3,
+        verbose=True,
+    )
+
+    # sequential reads grow the window until large windows are streamed
+    pos = 0
+    while pos < len(data):
+        f.seek(pos)
+        n = min(10000, len(data) - pos)
+        assert f.read(n) == data[pos: pos + n]
+        pos += n
+
+    # random access
+    rng = random.Random(1)
+    for _ in range(100):
+        pos = rng.randint(0, len(data) - 1)
+        n = rng.randint(1, 100000)
+        n = min(n, len(data) - pos)
+        f.seek(pos)
+        assert f.read(n) == data[pos: pos + n]
+    f.close()
+
+
+def test_stream_is_cancelled_when_reads_move_elsewhere(range_server):
+    data = range_server.data
+    f = remfile.File(
+        range_server.url,
+        _min_chunk_size=16 * 1024,
+        _max_chunk_size=1024 * 1024,
+    )
+    range_server.bytes_per_second = 2 * 1024 * 1024
+
+    # read sequentially until a stream is active
+    pos = 0
+    while f._active_stream is None:
+        f.seek(pos)
+        assert f.read(1000) == data[pos: pos + 1000]
+        pos += 1000
+    stream = f._active_stream
+
+    # the read returns before the whole 1 MB window has arrived
+    assert not stream.is_finished()
+
+    # moving elsewhere cancels the rest of the window
+    f.seek(len(data) - 1000)
+    assert f.read(1000) == data[-1000:]
+    assert f._active_stream is None
+    timer = time.time()
+    while not stream.is_finished():
+        assert time.time() - timer < 5
+        time.sleep(0.01)
+    assert stream.end_chunk_index not in f._chunks
+    f.close()
+
+
+class FlakyTransport(remfile.LocalFileTransport):
+    def __init__(self) -> None:
+        """A local file transport that fails while down is set, and counts requests."""
+        super().__init__()
+        self.down = False
+        self.num_requests = 0
+
+    def get_bytes(self, url, start_byte, end_byte):
+        self.num_requests += 1
+        if self.down:
+            raise Exception('net down')
+        return super().get_bytes(url, start_byte, end_byte)
+
+    def open_stream(self, url, start_byte, end_byte):
+        self.num_requests += 1
+        if self.down:
+            raise Exception('net down')
+        return super().open_stream(url, start_byte, end_byte)
+
+
+def _open_local(local_file, transport, **kwargs):
+    source = local_file()
+    f = remfile.File(
+        source.url,
+        transport=transport,
+        _min_chunk_size=16 * 1024,
+        _max_chunk_size=256 * 1024,
+        **kwargs
+    )
+    return f, source.data
+
+
+def _wait_until_finished(stream):
+    timer = time.time()
+    while not stream.is_finished():
+        assert time.time() - timer < 5
+        time.sleep(0.01)
+
+
+def test_failed_stream_is_retried_after_recovery(local_file, monkeypatch):
+    monkeypatch.setattr(importlib.import_module('remfile.RemFile'), '_num_request_retries', 1)
+    transport = FlakyTransport()
+    f, data = _open_local(local_file, transport)
+
+    # the stream runs out of retries while the network is down
+    transport.down = True
+    f._start_stream(20, 35)
+    stream = f._active_stream
+    _wait_until_finished(stream)
+    f.seek(20 * 16 * 1024 + 1000)
+    with pytest.raises(Exception, match='net down'):
+        f.read(100)
+    assert f._active_stream is None
+
+    # once the network is back, reads in the same window succeed
+    transport.down = False
+    for offset in [20 * 16 * 1024 + 1000, 26 * 16 * 1024 + 3000]:
+        f.seek(offset)
+        assert f.read(100) == data[offset: offset + 100]
+
+
+def test_stream_chunk_evicted_before_read(local_file):
+    transport = FlakyTransport()
+    f, data = _open_local(local_file, transport, _max_cache_size=8 * 16 * 1024)
+
+    f._start_stream(0, 63)
+    stream = f._active_stream
+    _wait_until_finished(stream)
+    # the first read evicts most of the 64 published chunks
+    f.seek(0)
+    assert f.read(100) == data[:100]
+    assert len(f._chunks) <= 8
+    assert 40 not in f._chunks
+
+    # an evicted chunk of the window is loaded again
+    num_requests = transport.num_requests
+    offset = 40 * 16 * 1024 + 5
+    f.seek(offset)
+    assert f.read(100) == data[offset: offset + 100]
+    assert transport.num_requests > num_requests
+
+
+def test_window_is_loaded_when_stream_threads_cannot_start(local_file, monkeypatch):
+    def start(self):
+        raise RuntimeError("can't start new thread")
+    monkeypatch.setattr(importlib.import_module('remfile.ChunkStream').ChunkStream, 'start', start)
+    transport = FlakyTransport()
+    f, data = _open_local(local_file, transport)
+
+    # sequential reads grow the window to the maximum, where it would be streamed
+    pos = 0
+    while pos < len(data):
+        f.seek(pos)
+        n = min(10000, len(data) - pos)
+        assert f.read(n) == data[pos: pos + n]
+        assert f._active_stream is None
+        pos += n
+    assert f._smart_loader_chunk_sequence_length == 16
@@ -0,0 +1,66 @@
+import random
+import pytest
+import remfile
+
+
+def _check_reads(f, data):
+    # sequential reads (which end up streaming) followed by random access
+    pos = 0
+    while pos < len(data):
+        f.seek(pos)
+        n = min(20000, len(data) - pos)
+        assert f.read(n) == data[pos: pos + n]
+        pos += n
+    rng = random.Random(1)
+    for _ in range(50):
+        pos = rng.randint(0, len(data) - 1)
+        n = min(rng.randint(1, 100000), len(data) - pos)
+        f.seek(pos)
+        assert f.read(n) == data[pos: pos + n]
+
+
+def test_local_file_transport(local_file):
+    source = local_file(2 * 1024 * 1024 + 5)
+    data = source.data
+    f = remfile.File(
+        source.url,
+        _min_chunk_size=16 * 1024,
+        _max_chunk_size=256 * 1024,
+        _impose_request_failures_for_testing=True,
+    )
+    assert isinstance(f.transport, remfile.LocalFileTransport)
+    assert f.length == len(data)
+    _check_reads(f, data)
+    f.close()
+
+
+def test_httpx_transport(range_server):
+    pytest.importorskip('httpx')
+    # the test server speaks HTTP/1.0, so this checks the httpx code path but not HTTP/2 multiplexing
+    transport = remfile.HttpxTransport()
+    f = remfile.File(
+        range_server.url,
+        transport=transport,
+        _min_chunk_size=16 * 1024,
+        _max_chunk_size=256 * 1024,
+        _bytes_per_thread=64 * 1024,
+        _max_threads=3,
+    )
+    assert f.length == len(range_server.data)
+    _check_reads(f, range_server.data)
+    f.close()
+
+    files = remfile.open_many([range_server.url] * 5, transport=transport, prefetch_size=1000)
+    for f in files:
+        f.seek(10)
+        assert f.read(100) == range_server.data[10:110]
+    transport.close()
+
+
+def test_requests_transport_max_concurrency():
+    import requests
+    assert remfile.RequestsTransport(pool_maxsize=4).max_concurrency == 4
+    assert remfile.RequestsTransport(use_session=False, pool_maxsize=3).max_concurrency == 3
+    session = requests.Session()
+    session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=7))
+    assert remfile.RequestsTransport(session, pool_maxsize=7).max_concurrency == 7